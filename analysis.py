@@ -0,0 +1,163 @@
+import argparse
+import os
+import sys
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+import chess.pgn
+
+import boba_slayer
+from persistent_hash import PersistentHash
+
+# Centipawns lost against the best line before a move gets a mark
+INACCURACY = 50
+MISTAKE = 100
+BLUNDER = 200
+
+# Positions allowed in flight per worker; bounds memory however large the archive
+POSITIONS_PER_JOB = 64
+
+def init_worker(hash_path, hash_mb):
+    """
+    Worker start-up: open the transposition table file all workers share,
+    so the K line searches of a position and the positions after it start
+    from the results already found.
+    """
+    boba_slayer.persistent_hash = PersistentHash(hash_path, hash_mb)
+
+def analyze_position(fen, move_uci, depth, multipv):
+    """
+    Worker: top `multipv` lines of a position and the score of the move that
+    was played. The evaluation caches live in the worker process and the
+    transposition table is shared, so both stay warm from one position to
+    the next.
+    Returns (lines, played_score, played_line), lines as (score, [uci, ...])
+    pairs; played_line is only filled in for mate scores.
+    """
+    board = chess.Board(fen)
+    move = chess.Move.from_uci(move_uci)
+    lines = boba_slayer.multipv_search(board, depth, multipv)
+    played_score, played_line = None, []
+    for score, line in lines:
+        if line[0] == move:
+            played_score, played_line = score, line
+    if played_score is None:
+        played_score = boba_slayer.score_move(board, move, depth)
+        if abs(played_score) >= boba_slayer.MATE_SCORE:
+            played_line = boba_slayer.principal_variation(board, move, depth)
+    if boba_slayer.persistent_hash is not None:
+        # Write back at once so the other workers see the results
+        boba_slayer.persistent_hash.flush()
+    return ([(score, [mv.uci() for mv in line]) for score, line in lines], played_score,
+            [mv.uci() for mv in played_line])
+
+def read_games(handle):
+    """Yield games one at a time from an open PGN file."""
+    while True:
+        game = chess.pgn.read_game(handle)
+        if game is None:
+            return
+        yield game
+
+def format_score(score, line):
+    """
+    Evaluation as PGN readers expect it: pawns, or #N / #-N for a mate in N
+    moves by White / Black, counted along `line` (the moves up to the mate).
+    """
+    if abs(score) >= boba_slayer.MATE_SCORE:
+        moves = (len(line) + 1) // 2
+        return f"#{moves}" if score > 0 else f"#-{moves}"
+    return f"{round(score) / 100:+.2f}"
+
+def annotate_game(game, results, depth):
+    """Add evals, multi-PV lines and mistake marks to the mainline of `game`."""
+    game.headers["Annotator"] = f"Boba Slayer (depth {depth})"
+    node = game
+    for lines, played_score, played_line in results:
+        board = node.board()
+        child = node.variations[0]
+        best_score, best_line = lines[0]
+        # Centipawns the mover gave away relative to the best line
+        loss = best_score - played_score if board.turn == chess.WHITE else played_score - best_score
+
+        shown = [f"{index}) {board.variation_san([chess.Move.from_uci(mv) for mv in line])} "
+                 f"({format_score(score, line)})"
+                 for index, (score, line) in enumerate(lines, start=1)]
+        # The eval is of the position after the played move
+        child.comment = f"[%eval {format_score(played_score, played_line[1:])}] " + " ".join(shown)
+
+        if loss >= BLUNDER:
+            child.nags.add(chess.pgn.NAG_BLUNDER)
+        elif loss >= MISTAKE:
+            child.nags.add(chess.pgn.NAG_MISTAKE)
+        elif loss >= INACCURACY:
+            child.nags.add(chess.pgn.NAG_DUBIOUS_MOVE)
+        if loss >= MISTAKE and best_line[0] != child.move.uci():
+            node.add_line([chess.Move.from_uci(mv) for mv in best_line])
+        node = child
+    return game
+
+def analyze_pgn(handle, out, depth, multipv, jobs, hash_path, hash_mb=64):
+    """
+    Stream games from `handle`, analyze every mainline position on a pool of
+    `jobs` workers sharing the transposition table at `hash_path`, and write
+    each annotated game to `out` once all of its positions are done. Games
+    are written in input order.
+    """
+    pending = deque()  # (game, futures) in input order
+    in_flight = 0
+    max_in_flight = jobs * POSITIONS_PER_JOB
+
+    def finish_oldest():
+        game, futures = pending.popleft()
+        print(annotate_game(game, [future.result() for future in futures], depth), file=out, end="\n\n")
+        out.flush()
+        return len(futures)
+
+    # Create the table before the workers start, so they never race to size it
+    PersistentHash(hash_path, hash_mb).close()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                             initargs=(hash_path, hash_mb)) as pool:
+        for game in read_games(handle):
+            board = game.board()
+            futures = []
+            for move in game.mainline_moves():
+                futures.append(pool.submit(analyze_position, board.fen(), move.uci(), depth, multipv))
+                board.push(move)
+            pending.append((game, futures))
+            in_flight += len(futures)
+            while in_flight > max_in_flight and pending:
+                in_flight -= finish_oldest()
+        while pending:
+            finish_oldest()
+
+def main(argv):
+    """Entry point for `python boba_slayer.py analyze games.pgn ...`."""
+    parser = argparse.ArgumentParser(prog="boba_slayer.py analyze",
+                                     description="Annotate a PGN archive with evals and mistake marks")
+    parser.add_argument("pgn")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--multipv", type=int, default=1)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="annotated PGN file (default: stdout)")
+    parser.add_argument("--hash", help="transposition table file to keep between runs "
+                                       "(default: a temporary file)")
+    parser.add_argument("--hash-mb", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    hash_path = args.hash
+    if hash_path is None:
+        handle, hash_path = tempfile.mkstemp(prefix="boba_slayer_", suffix=".hash")
+        os.close(handle)
+        os.remove(hash_path)  # PersistentHash creates it with the right size
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        with open(args.pgn, encoding="utf-8-sig") as handle:
+            analyze_pgn(handle, out, args.depth, args.multipv, args.jobs, hash_path, args.hash_mb)
+    finally:
+        if args.output:
+            out.close()
+        if args.hash is None and os.path.exists(hash_path):
+            os.remove(hash_path)
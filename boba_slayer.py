@@ -1,44 +1,226 @@
 #!/usr/bin/env python
 import chess
+import chess.polyglot
+import json
+import multiprocessing
+import os
 import random
+from collections import OrderedDict
 import sys
 import time
 
-try:
-    import pydot  # If missing, install via: pip install pydot
-    HAS_PYDOT = True
-except ImportError:
-    HAS_PYDOT = False
+import random_chess_bot
+from persistent_hash import BOUND_EXACT, BOUND_LOWER, BOUND_UPPER, PersistentHash
+from search_board import SearchBoard
+
+def load_pydot():
+    """
+    Import pydot on first use, so UCI play does not pay for it at start-up.
+    Returns None if it is missing (install via: pip install pydot).
+    """
+    try:
+        import pydot
+    except ImportError:
+        return None
+    return pydot
 
 # Global board object
 board = chess.Board()
 
+# Optional on-disk transposition table, shared across games and processes.
+# Opened with "setoption name PersistentHash value <file>".
+persistent_hash = None
+persistent_hash_mb = 16
+PERSISTENT_HASH_MAX_MB = 4096
+
+# Start FEN and move list of the last "position" command. A new command whose
+# moves extend these only pushes the added moves onto the board.
+last_position = [None, []]
+
+# ======== Evaluation Caches ========
+
+EVAL_CACHE_SIZE = 1 << 16   # entries, keyed by Zobrist hash
+PAWN_HASH_SIZE = 1 << 14    # entries, keyed by the two pawn bitboards
+
+class LRUCache:
+    """
+    Fixed-capacity mapping that evicts the least recently used entry once full.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+eval_cache = LRUCache(EVAL_CACHE_SIZE)
+pawn_hash = LRUCache(PAWN_HASH_SIZE)
+
+def clear_eval_caches():
+    eval_cache.clear()
+    pawn_hash.clear()
+
+def board_hash(board):
+    """Zobrist hash of a chess.Board or SearchBoard (the same keys for both)."""
+    if isinstance(board, SearchBoard):
+        return board.hash
+    return chess.polyglot.zobrist_hash(board)
+
 def evaluate_board(board):
     """
     Evaluate a given chess board position from the perspective of White.
     Returns a positive score if White is favored, or a negative score if Black is favored.
+    Scores are cached by Zobrist hash in eval_cache.
     """
-    if board.is_checkmate():
-        return -10000 if board.turn else 10000
-    if board.is_stalemate() or board.is_insufficient_material():
-        return 0
-
-    piece_values = {
-        chess.PAWN: 100,
-        chess.KNIGHT: 320,
-        chess.BISHOP: 330,
-        chess.ROOK: 500,
-        chess.QUEEN: 900,
-        chess.KING: 0  # We do not score the king in material calculations.
-    }
+    key = board_hash(board)
+    score = eval_cache.get(key)
+    if score is not None:
+        search_stats["eval_cache_hits"] += 1
+        return score
+    search_stats["eval_cache_misses"] += 1
+    score = compute_evaluation(board)
+    eval_cache.put(key, score)
+    return score
+
+# ======== Evaluation Weights ========
+
+# Weight of each evaluation feature; features count White minus Black.
+# tuning.py fits these to game results and exports them as JSON, which
+# load_eval_weights() reads (EVAL_WEIGHTS_FILE next to the engine is
+# loaded automatically).
+EVAL_WEIGHTS = {
+    "pawn": 100,
+    "knight": 320,
+    "bishop": 330,
+    "rook": 500,
+    "queen": 900,
+    "mobility": 0.1,        # per legal move
+    "center": 20,           # pawn or knight on d4, e4, d5, e5
+    "doubled_pawn": -15,
+    "isolated_pawn": -10,
+    "passed_pawn_2": 5,     # passed pawns by rank, relative to the owner
+    "passed_pawn_3": 10,
+    "passed_pawn_4": 20,
+    "passed_pawn_5": 35,
+    "passed_pawn_6": 60,
+    "passed_pawn_7": 100,
+}
+EVAL_FEATURES = list(EVAL_WEIGHTS)
+EVAL_WEIGHTS_FILE = "eval_weights.json"
+
+eval_weight_vector = list(EVAL_WEIGHTS.values())
+
+PIECE_FEATURES = {
+    chess.PAWN: "pawn",
+    chess.KNIGHT: "knight",
+    chess.BISHOP: "bishop",
+    chess.ROOK: "rook",
+    chess.QUEEN: "queen",
+}
+
+def piece_value(piece_type):
+    """Material weight of a piece type (the king is not scored)."""
+    return EVAL_WEIGHTS[PIECE_FEATURES[piece_type]] if piece_type in PIECE_FEATURES else 0
+
+def set_eval_weights(weights):
+    """Replace some or all evaluation weights and drop cached evaluations."""
+    global eval_weight_vector
+    if not isinstance(weights, dict):
+        raise ValueError("evaluation weights must be a JSON object of feature: weight")
+    unknown = set(weights) - set(EVAL_WEIGHTS)
+    if unknown:
+        raise ValueError(f"unknown evaluation features: {', '.join(sorted(unknown))}")
+    for name, value in weights.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"weight of {name} is not a number: {value!r}")
+    EVAL_WEIGHTS.update(weights)
+    eval_weight_vector = list(EVAL_WEIGHTS.values())
+    clear_eval_caches()
+
+def load_eval_weights(path):
+    with open(path) as f:
+        set_eval_weights(json.load(f))
+
+def engine_dir():
+    """Directory of the script, or of the executable when built with PyInstaller."""
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+def pawn_structure_features(white_pawns, black_pawns):
+    """
+    Doubled, isolated and passed-pawn-by-rank counts, White minus Black.
+    Depends only on the pawn bitboards, so the result is cached in pawn_hash.
+    """
+    key = (white_pawns, black_pawns)
+    features = pawn_hash.get(key)
+    if features is not None:
+        search_stats["pawn_hash_hits"] += 1
+        return features
+    search_stats["pawn_hash_misses"] += 1
+
+    # doubled, isolated, then passed pawns on relative ranks 2..7
+    counts = [0] * 8
+    for color, own, enemy in ((chess.WHITE, white_pawns, black_pawns),
+                              (chess.BLACK, black_pawns, white_pawns)):
+        sign = 1 if color == chess.WHITE else -1
+        for square in chess.scan_forward(own):
+            file = chess.square_file(square)
+            rank = chess.square_rank(square)
+            file_mask = chess.BB_FILES[file]
+            adjacent = 0
+            if file > 0:
+                adjacent |= chess.BB_FILES[file - 1]
+            if file < 7:
+                adjacent |= chess.BB_FILES[file + 1]
+
+            if not own & adjacent:
+                counts[1] += sign
+
+            # Squares in front of the pawn on its own and adjacent files
+            if color == chess.WHITE:
+                ahead = chess.BB_ALL << (8 * (rank + 1)) if rank < 7 else 0
+                relative_rank = rank
+            else:
+                ahead = chess.BB_ALL >> (8 * (8 - rank))
+                relative_rank = 7 - rank
+            ahead &= chess.BB_ALL
+            if own & file_mask & ahead:
+                counts[0] += sign  # a friendly pawn stands in front
+            elif not enemy & (file_mask | adjacent) & ahead and 1 <= relative_rank <= 6:
+                counts[1 + relative_rank] += sign
+
+    features = tuple(counts)
+    pawn_hash.put(key, features)
+    return features
+
+def evaluation_features(board):
+    """
+    Feature values of a position in EVAL_FEATURES order, White minus Black.
+    The evaluation is their dot product with the weights.
+    """
+    white = board.occupied_co[chess.WHITE]
+    black = board.occupied_co[chess.BLACK]
 
-    # Material (piece) score
-    material_score = 0
-    for square in chess.SQUARES:
-        piece = board.piece_at(square)
-        if piece:
-            value = piece_values[piece.piece_type]
-            material_score += value if piece.color == chess.WHITE else -value
+    # Material
+    features = [chess.popcount(pieces & white) - chess.popcount(pieces & black)
+                for pieces in (board.pawns, board.knights, board.bishops, board.rooks, board.queens)]
 
     # Mobility: difference in the number of legal moves
     original_turn = board.turn
@@ -47,7 +229,7 @@ def evaluate_board(board):
     board.turn = chess.BLACK
     black_mobility = len(list(board.legal_moves))
     board.turn = original_turn
-    mobility_score = 0.1 * (white_mobility - black_mobility)
+    features.append(white_mobility - black_mobility)
 
     # Basic center control: pawns and knights on central squares
     center_squares = [chess.E4, chess.D4, chess.E5, chess.D5]
@@ -55,11 +237,39 @@ def evaluate_board(board):
     for csq in center_squares:
         pc = board.piece_at(csq)
         if pc and pc.piece_type in [chess.PAWN, chess.KNIGHT]:
-            center_control += 20 if pc.color == chess.WHITE else -20
+            center_control += 1 if pc.color == chess.WHITE else -1
+    features.append(center_control)
+
+    # Pawn structure (cached separately, pawns change rarely)
+    features.extend(pawn_structure_features(board.pawns & white, board.pawns & black))
+    return features
+
+# Score of a checkmate, from White's view
+MATE_SCORE = 10000
+
+def compute_evaluation(board):
+    """
+    Uncached evaluation behind evaluate_board: material, mobility, center
+    control and pawn structure.
+    """
+    if board.is_checkmate():
+        return -MATE_SCORE if board.turn else MATE_SCORE
+    if board.is_stalemate() or board.is_insufficient_material():
+        return 0
 
-    total_score = material_score + mobility_score + center_control
+    total_score = 0
+    for weight, value in zip(eval_weight_vector, evaluation_features(board)):
+        total_score += weight * value
     return total_score
 
+# Pick up tuned weights exported next to the engine. A bad file only costs
+# the tuned weights: every tool and worker imports this module.
+if os.path.exists(os.path.join(engine_dir(), EVAL_WEIGHTS_FILE)):
+    try:
+        load_eval_weights(os.path.join(engine_dir(), EVAL_WEIGHTS_FILE))
+    except (OSError, ValueError) as e:
+        print(f"warning: {EVAL_WEIGHTS_FILE} not loaded, using the default weights: {e}", file=sys.stderr)
+
 def order_moves(board, limit_top_moves=False):
     """
     Order moves heuristically to improve alpha-beta pruning efficiency.
@@ -77,14 +287,7 @@ def order_moves(board, limit_top_moves=False):
             target_piece = board.piece_at(move.to_square)
             if target_piece:
                 # Reward capturing higher-value pieces
-                if target_piece.piece_type == chess.QUEEN:
-                    score += 900
-                elif target_piece.piece_type == chess.ROOK:
-                    score += 500
-                elif target_piece.piece_type in [chess.BISHOP, chess.KNIGHT]:
-                    score += 330
-                elif target_piece.piece_type == chess.PAWN:
-                    score += 100
+                score += piece_value(target_piece.piece_type)
 
         # Check moves
         board.push(move)
@@ -105,47 +308,221 @@ def order_moves(board, limit_top_moves=False):
 
     return [mv for mv, sc in scored_moves]
 
-def minimax(board, depth, alpha=float('-inf'), beta=float('inf'), maximizing_player=True):
+# ======== Selective Search ========
+
+# Each pruning technique can be switched off individually, e.g. to measure
+# its node savings with `python boba_slayer.py bench`.
+SELECTIVITY = {
+    "null_move": True,
+    "lmr": True,
+    "futility": True,
+}
+
+NULL_MOVE_REDUCTION = 2     # R: extra plies skipped by the null-move search
+NULL_MOVE_MIN_DEPTH = 3
+LMR_MIN_DEPTH = 3
+LMR_FULL_MOVES = 3          # the first moves in order are never reduced
+FUTILITY_MARGIN = 200       # frontier (depth 1) margin, roughly two pawns
+REVERSE_FUTILITY_MARGIN = 120  # per remaining ply
+REVERSE_FUTILITY_DEPTH = 2
+TT_MIN_DEPTH = 2            # shallower nodes skip the persistent hash
+
+# Counters filled in by minimax(); reset with reset_search_stats().
+search_stats = {
+    "nodes": 0,
+    "null_cutoffs": 0,
+    "lmr_reductions": 0,
+    "lmr_researches": 0,
+    "futility_prunes": 0,
+    "reverse_futility_prunes": 0,
+    "tt_cutoffs": 0,
+    "eval_cache_hits": 0,
+    "eval_cache_misses": 0,
+    "pawn_hash_hits": 0,
+    "pawn_hash_misses": 0,
+}
+
+# Node count at which minimax() abandons the search; see search_fixed_nodes().
+search_node_limit = None
+
+class SearchAborted(Exception):
+    """Raised by minimax() once search_stats["nodes"] passes search_node_limit."""
+
+def reset_search_stats():
+    for key in search_stats:
+        search_stats[key] = 0
+
+def hit_rate(stats, prefix):
+    """Hit rate of the eval_cache or pawn_hash counters in a search_stats snapshot."""
+    hits = stats[f"{prefix}_hits"]
+    probes = hits + stats[f"{prefix}_misses"]
+    return hits / probes if probes else 0.0
+
+def has_non_pawn_material(board, color):
+    """
+    True if `color` owns a knight, bishop, rook or queen. Null-move pruning is
+    skipped otherwise, since king-and-pawn endings are where zugzwang lives.
+    """
+    return bool(board.occupied_co[color] & ~(board.pawns | board.kings))
+
+def is_quiet_move(board, move):
+    """A move that neither captures, promotes nor gives check."""
+    return not (board.is_capture(move) or move.promotion or board.gives_check(move))
+
+def is_draw_by_rule(board):
+    """
+    Repetition or 50-move rule. Both depend on how the position was reached,
+    so minimax scores them 0 itself and never stores them in eval_cache.
+    On a SearchBoard any repetition counts; on a chess.Board, threefold.
+    """
+    return board.halfmove_clock >= 100 or board.is_repetition()
+
+def lmr_reduction(depth, move_index):
+    """Plies to reduce a late move by, growing with depth and move-order index."""
+    if depth >= 6 and move_index >= 2 * LMR_FULL_MOVES:
+        return 2
+    return 1
+
+def minimax(board, depth, alpha=float('-inf'), beta=float('inf'), maximizing_player=True,
+            allow_null=True):
     """
     Minimax algorithm with alpha-beta pruning.
+    Selective search (see SELECTIVITY) adds null-move pruning, late move
+    reductions and (reverse) futility pruning near the leaves.
+    `board` may be a chess.Board or a SearchBoard.
+    Raises SearchAborted once search_node_limit is passed.
     Returns (best_score, best_move).
     """
+    search_stats["nodes"] += 1
+    if search_node_limit is not None and search_stats["nodes"] > search_node_limit:
+        raise SearchAborted
+    if is_draw_by_rule(board):
+        return 0, None
     if depth == 0 or board.is_game_over():
         return evaluate_board(board), None
 
-    best_move = None
-    if maximizing_player:
-        max_eval = float('-inf')
-        moves = order_moves(board, limit_top_moves=(depth < 3))
-        for move in moves:
-            board.push(move)
-            eval_child, _ = minimax(board, depth - 1, alpha, beta, False)
+    # Transposition table: a deep enough entry settles the node if its bound
+    # fits the window; otherwise its move is searched first.
+    tt_move = None
+    use_tt = persistent_hash is not None and depth >= TT_MIN_DEPTH
+    if use_tt:
+        key = board_hash(board)
+        entry = persistent_hash.probe(key)
+        if entry is not None:
+            tt_move = entry.move
+            if entry.depth >= depth and (entry.bound == BOUND_EXACT
+                                         or (entry.bound == BOUND_LOWER and entry.score >= beta)
+                                         or (entry.bound == BOUND_UPPER and entry.score <= alpha)):
+                # The legality check guards against Zobrist collisions.
+                if tt_move in board.legal_moves:
+                    search_stats["tt_cutoffs"] += 1
+                    return entry.score, tt_move
+    alpha_start, beta_start = alpha, beta
+
+    in_check = board.is_check()
+
+    # Static evaluation is only needed by the near-leaf pruning rules.
+    static_eval = None
+    if SELECTIVITY["futility"] and not in_check and depth <= REVERSE_FUTILITY_DEPTH:
+        static_eval = evaluate_board(board)
+
+        # Reverse futility: the side to move is so far ahead that even
+        # losing a margin per remaining ply keeps it outside the window.
+        margin = REVERSE_FUTILITY_MARGIN * depth
+        if maximizing_player and static_eval - margin >= beta:
+            search_stats["reverse_futility_prunes"] += 1
+            return static_eval, None
+        if not maximizing_player and static_eval + margin <= alpha:
+            search_stats["reverse_futility_prunes"] += 1
+            return static_eval, None
+
+    # Null-move pruning: pass the turn and search shallower with a null
+    # window. If the opponent still cannot get back inside the window, the
+    # real moves will not either.
+    if (SELECTIVITY["null_move"] and allow_null and not in_check
+            and depth >= NULL_MOVE_MIN_DEPTH
+            and has_non_pawn_material(board, board.turn)):
+        reduced = depth - 1 - NULL_MOVE_REDUCTION
+        if maximizing_player and beta != float('inf'):
+            board.push(chess.Move.null())
+            null_score, _ = minimax(board, reduced, beta - 1, beta, False, False)
             board.pop()
-
-            if eval_child > max_eval:
-                max_eval = eval_child
-                best_move = move
-            alpha = max(alpha, max_eval)
-            if beta <= alpha:
-                # Beta pruning
-                break
-        return max_eval, best_move
-    else:
-        min_eval = float('inf')
-        moves = order_moves(board, limit_top_moves=(depth < 3))
-        for move in moves:
-            board.push(move)
-            eval_child, _ = minimax(board, depth - 1, alpha, beta, True)
+            if null_score >= beta:
+                search_stats["null_cutoffs"] += 1
+                return null_score, None
+        elif not maximizing_player and alpha != float('-inf'):
+            board.push(chess.Move.null())
+            null_score, _ = minimax(board, reduced, alpha, alpha + 1, True, False)
             board.pop()
+            if null_score <= alpha:
+                search_stats["null_cutoffs"] += 1
+                return null_score, None
+
+    # Futility: at the frontier, quiet moves cannot lift a hopeless static
+    # score back into the window.
+    futile = False
+    if SELECTIVITY["futility"] and static_eval is not None and depth == 1:
+        if maximizing_player:
+            futile = static_eval + FUTILITY_MARGIN <= alpha
+        else:
+            futile = static_eval - FUTILITY_MARGIN >= beta
+
+    best_move = None
+    best_eval = float('-inf') if maximizing_player else float('inf')
+    moves = order_moves(board)
+    if tt_move in moves:
+        moves.remove(tt_move)
+        moves.insert(0, tt_move)
+    for index, move in enumerate(moves):
+        # gives_check() costs a make/unmake, so only ask when a pruning rule
+        # can use the answer.
+        reducible = SELECTIVITY["lmr"] and depth >= LMR_MIN_DEPTH and index >= LMR_FULL_MOVES
+        quiet = (not in_check and (reducible or (futile and best_move is not None))
+                 and is_quiet_move(board, move))
+
+        if futile and quiet and best_move is not None:
+            search_stats["futility_prunes"] += 1
+            continue
+
+        board.push(move)
+        eval_child = None
+        if reducible and quiet:
+            search_stats["lmr_reductions"] += 1
+            reduced = max(depth - 1 - lmr_reduction(depth, index), 0)
+            eval_child, _ = minimax(board, reduced, alpha, beta, not maximizing_player)
+            # A reduced move that beats the current bound is re-searched
+            # at full depth before it is trusted.
+            improves = eval_child > alpha if maximizing_player else eval_child < beta
+            if improves:
+                search_stats["lmr_researches"] += 1
+                eval_child = None
+        if eval_child is None:
+            eval_child, _ = minimax(board, depth - 1, alpha, beta, not maximizing_player)
+        board.pop()
 
-            if eval_child < min_eval:
-                min_eval = eval_child
+        if maximizing_player:
+            if eval_child > best_eval:
+                best_eval = eval_child
                 best_move = move
-            beta = min(beta, min_eval)
-            if beta <= alpha:
-                # Alpha pruning
-                break
-        return min_eval, best_move
+            alpha = max(alpha, best_eval)
+        else:
+            if eval_child < best_eval:
+                best_eval = eval_child
+                best_move = move
+            beta = min(beta, best_eval)
+        if beta <= alpha:
+            # Alpha-beta cutoff
+            break
+
+    if use_tt and best_move is not None:
+        if best_eval >= beta_start:
+            bound = BOUND_LOWER
+        elif best_eval <= alpha_start:
+            bound = BOUND_UPPER
+        else:
+            bound = BOUND_EXACT
+        persistent_hash.store(key, best_eval, best_move, depth, bound)
+    return best_eval, best_move
 
 # ======== Visualization and Tree-Building Code ========
 
@@ -248,6 +625,7 @@ def draw_tree_dot(root_node, graph=None, parent_id=None, edge_label=None):
     Recursively add nodes to a pydot graph for visualization.
     If a node is pruned=True, color it lightgray and its edge red.
     """
+    pydot = load_pydot()
     if graph is None:
         graph = pydot.Dot("MinimaxTree", graph_type='digraph', rankdir="TB")
 
@@ -309,7 +687,7 @@ def generate_minimax_visualization():
     print(f"Root Evaluation: {final_score}")
     print(f"Chosen best move for White: {best_move_uci}")
 
-    if not HAS_PYDOT:
+    if load_pydot() is None:
         print("warning: pydot is not installed, cannot generate graph visualization.")
         return
 
@@ -325,6 +703,9 @@ def generate_minimax_visualization():
 def iterative_deepening(board, max_depth, time_limit=5.0):
     """
     Iterative deepening search with a time limit.
+    If a persistent hash is open, a stored exact result at least max_depth
+    deep is returned without searching, and each completed iteration is
+    stored; minimax() also uses it below the root.
     """
     start_time = time.time()
     best_move = None
@@ -333,14 +714,108 @@ def iterative_deepening(board, max_depth, time_limit=5.0):
     except IndexError:
         return None
 
+    key = chess.polyglot.zobrist_hash(board)
+    if persistent_hash is not None:
+        entry = persistent_hash.probe(key)
+        # The legality check guards against Zobrist collisions.
+        if (entry and entry.depth >= max_depth and entry.bound == BOUND_EXACT
+                and entry.move in board.legal_moves):
+            return entry.move
+
+    # The search itself runs on the lighter SearchBoard
+    search_board = SearchBoard(board)
     for depth in range(1, max_depth + 1):
         if time.time() - start_time > time_limit:
             break
-        score, move = minimax(board, depth, float('-inf'), float('inf'), board.turn == chess.WHITE)
+        score, move = minimax(search_board, depth, float('-inf'), float('inf'), board.turn == chess.WHITE)
         if move:
             best_move = move
+            if persistent_hash is not None:
+                persistent_hash.store(key, score, move, depth)
     return best_move
 
+def search_fixed_nodes(board, node_limit, max_depth=8):
+    """
+    Iterative deepening on a node budget: the iteration running when
+    `node_limit` nodes have been searched is abandoned, and the move of the
+    last completed one is played. Depth 1 always completes, so a move is
+    found whenever there is one.
+    Returns (score, best_move) of the deepest completed iteration, score from
+    White's view.
+    """
+    global search_node_limit
+    search_board = SearchBoard(board)
+    start_nodes = search_stats["nodes"]
+    best_score, best_move = None, None
+    try:
+        for depth in range(1, max_depth + 1):
+            if depth > 1:
+                search_node_limit = start_nodes + node_limit
+            score, move = minimax(search_board, depth, float('-inf'), float('inf'), board.turn == chess.WHITE)
+            if move:
+                best_score, best_move = score, move
+            if search_stats["nodes"] - start_nodes >= node_limit:
+                break
+    except SearchAborted:
+        # search_board is left mid-line; it is not used again
+        pass
+    finally:
+        search_node_limit = None
+    return best_score, best_move
+
+def principal_variation(board, first_move, depth):
+    """
+    Line starting with `first_move`, extended by searching each following
+    position one ply shallower. `board` is left unchanged.
+    """
+    line = [first_move]
+    board.push(first_move)
+    for remaining in range(depth - 1, 0, -1):
+        if board.is_game_over():
+            break
+        _, move = minimax(board, remaining, float('-inf'), float('inf'), board.turn == chess.WHITE)
+        if move is None:
+            break
+        line.append(move)
+        board.push(move)
+    for _ in line:
+        board.pop()
+    return line
+
+def multipv_search(board, depth, multipv=1):
+    """
+    Search the `multipv` best root moves of a chess.Board to a fixed depth.
+    Each line comes from a root search over the moves not reported yet.
+    Returns a list of (score, line) pairs, best first, scores from White's view.
+    """
+    search_board = SearchBoard(board)
+    maximizing = board.turn == chess.WHITE
+    remaining = order_moves(search_board)
+    lines = []
+    while remaining and len(lines) < multipv:
+        alpha, beta = float('-inf'), float('inf')
+        best_score, best_move = None, None
+        for move in remaining:
+            search_board.push(move)
+            score, _ = minimax(search_board, depth - 1, alpha, beta, not maximizing)
+            search_board.pop()
+            if maximizing and (best_move is None or score > best_score):
+                best_score, best_move = score, move
+                alpha = score
+            elif not maximizing and (best_move is None or score < best_score):
+                best_score, best_move = score, move
+                beta = score
+        remaining.remove(best_move)
+        lines.append((best_score, principal_variation(search_board, best_move, depth)))
+    return lines
+
+def score_move(board, move, depth):
+    """Score of playing `move` in a chess.Board, searched to `depth` in total."""
+    search_board = SearchBoard(board)
+    search_board.push(move)
+    score, _ = minimax(search_board, depth - 1, float('-inf'), float('inf'), search_board.turn == chess.WHITE)
+    return score
+
 def make_best_move(board):
     """
     Find and return the best move for the current board position.
@@ -349,6 +824,119 @@ def make_best_move(board):
         return None
     return iterative_deepening(board, max_depth=3, time_limit=1.0)
 
+# ======== Bench ========
+
+BENCH_POSITIONS = [
+    chess.STARTING_FEN,
+    "rnbqkbnr/pppp1ppp/4p3/3p4/2PP4/8/PP2PPPP/RNBQKBNR w KQkq - 0 3",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 8",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
+
+# Null-move pruning needs depth NULL_MOVE_MIN_DEPTH below a finite window,
+# so shallower benches cannot show its savings.
+BENCH_DEPTH = NULL_MOVE_MIN_DEPTH + 1
+
+def bench_search(depth):
+    """
+    Search every bench position to a fixed depth with the current
+    SELECTIVITY settings. Returns (nodes, seconds).
+    """
+    reset_search_stats()
+    clear_eval_caches()
+    start_time = time.time()
+    for fen in BENCH_POSITIONS:
+        bench_board = SearchBoard(chess.Board(fen))
+        minimax(bench_board, depth, float('-inf'), float('inf'), bench_board.turn == chess.WHITE)
+    return search_stats["nodes"], time.time() - start_time
+
+def run_bench(depth=BENCH_DEPTH):
+    """
+    Report node counts for the bench positions with all pruning on, with each
+    technique switched off in turn, and with all of them off.
+    """
+    saved = dict(SELECTIVITY)
+    configs = [("all on", {})]
+    configs += [(f"no {name}", {name: False}) for name in SELECTIVITY]
+    configs.append(("all off", {name: False for name in SELECTIVITY}))
+
+    results = []
+    for label, overrides in configs:
+        SELECTIVITY.update(saved)
+        SELECTIVITY.update(overrides)
+        nodes, elapsed = bench_search(depth)
+        results.append((label, nodes, elapsed, dict(search_stats)))
+    SELECTIVITY.update(saved)
+
+    baseline_nodes = results[-1][1]
+    all_on_nodes = results[0][1]
+    print(f"=== Bench: {len(BENCH_POSITIONS)} positions, depth {depth} ===")
+    for label, nodes, elapsed, stats in results:
+        nps = int(nodes / elapsed) if elapsed > 0 else 0
+        print(f"{label:<14} nodes {nodes:>9}  time {elapsed:7.2f}s  nps {nps:>7}  "
+              f"eval cache {hit_rate(stats, 'eval_cache'):6.1%}  "
+              f"pawn hash {hit_rate(stats, 'pawn_hash'):6.1%}")
+        if label.startswith("no "):
+            # What this technique saves on top of the others
+            saved_nodes = nodes - all_on_nodes
+            print(f"{'':<14} saves {saved_nodes} nodes when enabled")
+    total = results[0][3]
+    print(f"null-move cutoffs {total['null_cutoffs']}, "
+          f"LMR reductions {total['lmr_reductions']} ({total['lmr_researches']} re-searched), "
+          f"futility prunes {total['futility_prunes']}, "
+          f"reverse futility prunes {total['reverse_futility_prunes']}")
+    if baseline_nodes:
+        print(f"selective search visits {100.0 * all_on_nodes / baseline_nodes:.1f}% "
+              f"of the full-width nodes")
+
+def set_option(msg: str):
+    """
+    Handle "setoption name <name> [value <value>]".
+    PersistentHashMB only sizes files created afterwards; an existing file
+    keeps the size it was created with.
+    """
+    global persistent_hash, persistent_hash_mb
+    name, _, value = msg.removeprefix("setoption name ").partition(" value ")
+    name = name.strip()
+    value = value.strip()
+    if name == "PersistentHashMB":
+        try:
+            size_mb = int(value)
+        except ValueError:
+            size_mb = 0
+        if 1 <= size_mb <= PERSISTENT_HASH_MAX_MB:
+            persistent_hash_mb = size_mb
+        else:
+            print(f"info string PersistentHashMB must be 1 to {PERSISTENT_HASH_MAX_MB}, "
+                  f"keeping {persistent_hash_mb}")
+            sys.stdout.flush()
+    elif name == "EvalWeights":
+        if value and value != "<empty>":
+            try:
+                load_eval_weights(value)
+            except (OSError, ValueError) as e:
+                print(f"info string EvalWeights not loaded: {e}")
+                sys.stdout.flush()
+    elif name == "PersistentHash":
+        if persistent_hash is not None:
+            persistent_hash.close()
+            persistent_hash = None
+        if value and value != "<empty>":
+            try:
+                persistent_hash = PersistentHash(value, persistent_hash_mb)
+            except (OSError, ValueError) as e:
+                print(f"info string PersistentHash disabled: {e}")
+                sys.stdout.flush()
+
+def set_position(fen, moves):
+    """
+    Set the global board to `fen` followed by `moves` (UCI strings).
+    If this extends the previous position command, only the new moves are
+    pushed; otherwise the board is rebuilt from the FEN.
+    """
+    random_chess_bot.apply_position(board, last_position, fen, moves)
+
 def uci(msg: str):
     """
     Handle UCI protocol messages.
@@ -357,25 +945,25 @@ def uci(msg: str):
     if msg == "uci":
         print("id name Boba Slayer")
         print("id author Quancheng Li")
+        print("option name PersistentHash type string default <empty>")
+        print(f"option name PersistentHashMB type spin default 16 min 1 max {PERSISTENT_HASH_MAX_MB}")
+        print("option name EvalWeights type string default <empty>")
         print("uciok")
         sys.stdout.flush()
+    elif msg.startswith("setoption name "):
+        set_option(msg)
     elif msg == "isready":
         print("readyok")
         sys.stdout.flush()
-    elif msg.startswith("position startpos moves"):
-        board.clear()
-        board.set_fen(chess.STARTING_FEN)
-        moves = msg.split()[3:]
-        for mv in moves:
-            board.push(chess.Move.from_uci(mv))
+    elif msg.startswith("position startpos"):
+        parts = msg.split(" moves ")
+        moves = parts[1].split() if len(parts) > 1 else []
+        set_position(chess.STARTING_FEN, moves)
     elif msg.startswith("position fen"):
         parts = msg.split(" moves ")
         fen_str = parts[0].removeprefix("position fen ")
-        board.set_fen(fen_str)
-        if len(parts) > 1:
-            moves = parts[1].split()
-            for mv in moves:
-                board.push(chess.Move.from_uci(mv))
+        moves = parts[1].split() if len(parts) > 1 else []
+        set_position(fen_str, moves)
     elif msg.startswith("go"):
         best_move = make_best_move(board)
         if best_move:
@@ -383,17 +971,35 @@ def uci(msg: str):
         else:
             print("bestmove 0000")
         sys.stdout.flush()
+        if persistent_hash is not None:
+            persistent_hash.flush()
     elif msg == "quit":
+        if persistent_hash is not None:
+            persistent_hash.close()
         sys.exit(0)
 
 def main():
     """
     Main entry point. If 'draw' is passed as an argument, generate the minimax visualization.
+    'bench [depth]' reports search node counts with each pruning technique on and off.
+    'analyze games.pgn [--depth D] [--multipv K] [--jobs N]' annotates a PGN archive.
+    'serve [--port P] [--workers N]' runs the multi-game server (see engine_server.py).
     Otherwise, run as a standard UCI engine.
     """
     if len(sys.argv) > 1 and sys.argv[1] == "draw":
         generate_minimax_visualization()
         sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "analyze":
+        import analysis
+        analysis.main(sys.argv[2:])
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        import engine_server
+        engine_server.main(sys.argv[2:])
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        run_bench(int(sys.argv[2]) if len(sys.argv) > 2 else BENCH_DEPTH)
+        sys.exit(0)
 
     try:
         while True:
@@ -407,4 +1013,7 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # In a frozen (PyInstaller) build, spawned analysis and server workers
+    # must not fall through to main() and the UCI loop
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+# The server process only speaks UCI; the engine is imported in the search
+# workers, so many idle sessions cost almost nothing.
+
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+DEFAULT_PORT = 5100
+
+# Set in each worker process by init_worker()
+engine = None
+
+# Options the engine takes as "setoption" that the server sets for all
+# sessions from its command line instead
+SERVER_OPTIONS = {
+    "PersistentHash": "--hash",
+    "PersistentHashMB": "--hash-mb",
+    "EvalWeights": "--eval-weights",
+}
+
+def init_worker(hash_path, hash_mb, eval_weights=None):
+    """
+    Worker start-up: import the engine once, load the server's evaluation
+    weights and open the transposition table file that all workers, and so
+    all games, share. minimax() probes and stores it during every search.
+    """
+    global engine
+    import boba_slayer
+    from persistent_hash import PersistentHash
+    engine = boba_slayer
+    if eval_weights:
+        engine.load_eval_weights(eval_weights)
+    engine.persistent_hash = PersistentHash(hash_path, hash_mb)
+
+def search(fen, moves):
+    """Worker: best move (UCI string) for `fen` followed by `moves`."""
+    # set_position only pushes new moves when this worker searched the
+    # same game last time
+    engine.set_position(fen, moves)
+    move = engine.make_best_move(engine.board)
+    # Write back at once so the other workers see the result
+    engine.persistent_hash.flush()
+    return move.uci() if move else "0000"
+
+def parse_position(msg):
+    """Split a UCI "position" command into (fen, [uci moves])."""
+    parts = msg.split(" moves ")
+    moves = parts[1].split() if len(parts) > 1 else []
+    if parts[0].startswith("position fen "):
+        return parts[0].removeprefix("position fen ").strip(), moves
+    return STARTING_FEN, moves
+
+class Session:
+    """
+    One UCI conversation on one connection. Searches run on the shared
+    process pool, so the session keeps answering (e.g. isready) meanwhile.
+    """
+
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.fen = STARTING_FEN
+        self.moves = []
+        self.search_task = None
+
+    async def send(self, *lines):
+        for line in lines:
+            self.writer.write(line.encode() + b"\n")
+        await self.writer.drain()
+
+    async def run(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            msg = line.decode().strip()
+            if msg == "quit":
+                break
+            await self.handle(msg)
+        if self.search_task is not None:
+            await self.search_task
+
+    async def handle(self, msg):
+        if msg == "uci":
+            await self.send("id name Boba Slayer", "id author Quancheng Li", "uciok")
+        elif msg == "isready":
+            await self.send("readyok")
+        elif msg == "ucinewgame":
+            self.fen, self.moves = STARTING_FEN, []
+        elif msg.startswith("position"):
+            self.fen, self.moves = parse_position(msg)
+        elif msg.startswith("go"):
+            # A go sent during a search is queued behind it, so every go
+            # gets its bestmove, in order
+            self.search_task = asyncio.create_task(self.go(self.fen, list(self.moves), self.search_task))
+        elif msg.startswith("setoption name "):
+            name = msg.removeprefix("setoption name ").partition(" value ")[0].strip()
+            if name in SERVER_OPTIONS:
+                await self.send(f"info string {name} is shared by all games; "
+                                f"set it with engine_server.py {SERVER_OPTIONS[name]}")
+            else:
+                await self.send(f"info string unknown option {name}")
+        elif msg == "stop":
+            # Searches are short and cannot be interrupted; bestmove follows
+            if self.search_task is not None and not self.search_task.done():
+                await self.send("info string stop: the running search finishes within its time limit")
+
+    async def go(self, fen, moves, previous=None):
+        if previous is not None:
+            await previous
+        loop = asyncio.get_running_loop()
+        try:
+            best_move = await loop.run_in_executor(self.server.pool, search, fen, moves)
+        except Exception as e:
+            await self.send(f"info string Error: {e}", "bestmove 0000")
+            return
+        await self.send(f"bestmove {best_move}")
+
+class EngineServer:
+    """Accepts UCI sessions and schedules their searches on a bounded pool."""
+
+    def __init__(self, workers, hash_path, hash_mb, eval_weights=None):
+        # Spawned, not forked: a forked worker would inherit the open client
+        # sockets and keep them alive after their sessions close.
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                        initargs=(hash_path, hash_mb, eval_weights),
+                                        mp_context=multiprocessing.get_context("spawn"))
+        self.sessions = 0
+
+    async def handle_connection(self, reader, writer):
+        self.sessions += 1
+        print(f"session opened ({self.sessions} active)", file=sys.stderr)
+        try:
+            await Session(self, reader, writer).run()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+            print(f"session closed ({self.sessions} active)", file=sys.stderr)
+
+    async def serve(self, host, port, unix_path=None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_path)
+            where = unix_path
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+            where = f"{host}:{port}"
+        print(f"Boba Slayer server listening on {where}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+def main(argv=None):
+    """
+    Serve many UCI games from one process:
+        python engine_server.py [--port 5100] [--workers N] [--hash FILE] [--eval-weights FILE]
+    GUIs connect through uci_shim.py.
+    """
+    parser = argparse.ArgumentParser(description="Multi-game Boba Slayer engine server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="listen on a Unix socket at this path instead")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="search processes shared by all sessions")
+    parser.add_argument("--hash", help="shared transposition table file (default: a temporary file)")
+    parser.add_argument("--hash-mb", type=int, default=64)
+    parser.add_argument("--eval-weights", help="tuned weights JSON for all games (see tuning.py)")
+    args = parser.parse_args(argv)
+    if args.eval_weights:
+        # Check the file here: a worker that fails to start breaks the pool
+        import boba_slayer
+        try:
+            boba_slayer.load_eval_weights(args.eval_weights)
+        except (OSError, ValueError) as e:
+            parser.error(f"{args.eval_weights}: {e}")
+
+    hash_path = args.hash
+    if hash_path is None:
+        handle, hash_path = tempfile.mkstemp(prefix="boba_slayer_", suffix=".hash")
+        os.close(handle)
+        os.remove(hash_path)  # PersistentHash creates it with the right size
+    # Create the table before the workers start, so they never race to size it
+    from persistent_hash import PersistentHash
+    PersistentHash(hash_path, args.hash_mb).close()
+
+    server = EngineServer(args.workers, hash_path, args.hash_mb, args.eval_weights)
+    # Shut down cleanly (and remove a temporary table) when terminated
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.pool.shutdown()
+        if args.hash is None and os.path.exists(hash_path):
+            os.remove(hash_path)
+
+if __name__ == "__main__":
+    # Lets spawned workers start in a frozen (PyInstaller) build
+    multiprocessing.freeze_support()
+    main()
@@ -5,13 +5,17 @@ import random_chess_bot
 
 board = chess.Board()
 
+# Start FEN and moves of the last "position" command
+last_position = [None, []]
+
 def find_mate_in_one(b: chess.Board):
     """Finds a mate-in-one move if available."""
     for move in b.legal_moves:
         b.push(move)
-        if b.is_checkmate():
-            return move
+        mate = b.is_checkmate()
         b.pop()
+        if mate:
+            return move
     return None
 
 def make_move(b: chess.Board):
@@ -29,15 +33,15 @@ def uci(msg: str):
         print("uciok")
     elif msg == "isready":
         print("readyok")
-    elif msg.startswith("position startpos moves"):
-        board.clear()
-        board.set_fen(chess.STARTING_FEN)
-        moves = msg.split()[3:]
-        for move in moves:
-            board.push(chess.Move.from_uci(move))
+    elif msg.startswith("position startpos"):
+        parts = msg.split(" moves ")
+        moves = parts[1].split() if len(parts) > 1 else []
+        random_chess_bot.apply_position(board, last_position, chess.STARTING_FEN, moves)
     elif msg.startswith("position fen"):
-        fen = msg.removeprefix("position fen ")
-        board.set_fen(fen)
+        parts = msg.split(" moves ")
+        fen = parts[0].removeprefix("position fen ")
+        moves = parts[1].split() if len(parts) > 1 else []
+        random_chess_bot.apply_position(board, last_position, fen, moves)
     elif msg.startswith("go"):
         move = make_move(board) 
         print(f"bestmove {move}")
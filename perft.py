@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+import chess.polyglot
+
+from search_board import SearchBoard
+
+# Standard perft reference positions with their known node counts by depth
+# (https://www.chessprogramming.org/Perft_Results)
+PERFT_POSITIONS = [
+    (chess.STARTING_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+BOARD_TYPES = ["python-chess", "search"]
+
+HASH_TABLE_SIZE = 1 << 20  # entries; the table stops growing once full
+
+# Subtree counts for --hash, one table per process. It is cleared for each
+# divide, and the root moves a process searches share it.
+perft_table = {}
+
+def clear_table():
+    perft_table.clear()
+
+def make_board(fen, board_type):
+    board = chess.Board(fen)
+    return SearchBoard(board) if board_type == "search" else board
+
+def perft(board, depth, table=None):
+    """
+    Count the leaf nodes `depth` plies below `board`. If `table` is a dict,
+    subtree counts are shared between transpositions, keyed by Zobrist hash.
+    """
+    if depth == 0:
+        return 1
+    if depth == 1:
+        return sum(1 for _ in board.generate_legal_moves())
+
+    if table is not None:
+        key = (board.hash if isinstance(board, SearchBoard) else chess.polyglot.zobrist_hash(board), depth)
+        nodes = table.get(key)
+        if nodes is not None:
+            return nodes
+
+    nodes = 0
+    for move in list(board.generate_legal_moves()):
+        board.push(move)
+        nodes += perft(board, depth - 1, table)
+        board.pop()
+
+    if table is not None and len(table) < HASH_TABLE_SIZE:
+        table[key] = nodes
+    return nodes
+
+def perft_move(fen, move_uci, depth, board_type, use_hash):
+    """Worker: perft below one root move, using this process's perft_table."""
+    board = make_board(fen, board_type)
+    board.push(chess.Move.from_uci(move_uci))
+    return perft(board, depth - 1, perft_table if use_hash else None)
+
+def divide(fen, depth, board_type="search", jobs=1, use_hash=False):
+    """
+    Perft split by root move. Root moves are spread across `jobs` processes.
+    Returns a list of (move_uci, nodes) in move generation order.
+    """
+    board = make_board(fen, board_type)
+    moves = [move.uci() for move in board.generate_legal_moves()]
+    args = [(fen, move, depth, board_type, use_hash) for move in moves]
+    clear_table()
+    if jobs > 1 and depth > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=clear_table) as pool:
+            counts = list(pool.map(perft_move, *zip(*args)))
+    else:
+        counts = [perft_move(*arg) for arg in args]
+    return list(zip(moves, counts))
+
+def timed_divide(fen, depth, board_type, jobs, use_hash):
+    start_time = time.time()
+    results = divide(fen, depth, board_type, jobs, use_hash)
+    elapsed = time.time() - start_time
+    nodes = sum(count for _, count in results)
+    return results, nodes, elapsed
+
+def run_divide(fen, depth, board_type, jobs, use_hash):
+    results, nodes, elapsed = timed_divide(fen, depth, board_type, jobs, use_hash)
+    for move, count in results:
+        print(f"{move}: {count}")
+    nps = int(nodes / elapsed) if elapsed > 0 else 0
+    print(f"\nNodes searched: {nodes}")
+    print(f"Time: {elapsed:.2f}s  nps: {nps} ({board_type}, {jobs} jobs)")
+
+def run_check(max_depth, jobs, use_hash):
+    """
+    Compare both board types against the reference counts up to `max_depth`
+    and report nodes per second for each. Returns True if all counts match.
+    """
+    ok = True
+    totals = {board_type: [0, 0.0] for board_type in BOARD_TYPES}
+    for fen, expected_counts in PERFT_POSITIONS:
+        for depth, expected in enumerate(expected_counts[:max_depth], start=1):
+            for board_type in BOARD_TYPES:
+                _, nodes, elapsed = timed_divide(fen, depth, board_type, jobs, use_hash)
+                totals[board_type][0] += nodes
+                totals[board_type][1] += elapsed
+                status = "ok  " if nodes == expected else "FAIL"
+                ok = ok and nodes == expected
+                print(f"{status} {board_type:<12} depth {depth}  {nodes:>9} / {expected:<9} {fen}")
+    print()
+    for board_type, (nodes, elapsed) in totals.items():
+        nps = int(nodes / elapsed) if elapsed > 0 else 0
+        print(f"{board_type:<12} {nodes} nodes in {elapsed:.2f}s, nps {nps}")
+    return ok
+
+def main():
+    """
+    Perft divide for a position, or a correctness check against the
+    reference positions:
+        python perft.py 4 [FEN] [--board python-chess|search] [--jobs N] [--hash]
+        python perft.py --check [--max-depth 3]
+    """
+    parser = argparse.ArgumentParser(description="Move generation perft and divide")
+    parser.add_argument("depth", type=int, nargs="?", default=3)
+    parser.add_argument("fen", nargs="*", help="position to divide (default: start position)")
+    parser.add_argument("--board", choices=BOARD_TYPES, default="search")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--hash", action="store_true", help="cache subtree counts of transpositions")
+    parser.add_argument("--check", action="store_true", help="verify the reference positions")
+    parser.add_argument("--max-depth", type=int, default=3, help="deepest reference count for --check")
+    args = parser.parse_args()
+
+    if args.check:
+        raise SystemExit(0 if run_check(args.max_depth, args.jobs, args.hash) else 1)
+    fen = " ".join(args.fen) if args.fen else chess.STARTING_FEN
+    run_divide(fen, args.depth, args.board, args.jobs, args.hash)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+
+import chess
+
+# File layout: a 16-byte header followed by fixed 16-byte slots.
+#   header: magic, format version, slot count
+#   slot:   check (key XOR data), score, packed move, depth, flags
+HEADER = struct.Struct("<8sII")
+SLOT = struct.Struct("<QfHBB")
+DATA = struct.Struct("<fHBB")
+MAGIC = b"BOBAHASH"
+VERSION = 1
+
+FLAG_USED = 1
+# Whether a score is exact or only a bound from an alpha-beta cutoff. Old
+# root-only entries carry neither bit, and they were exact.
+BOUND_EXACT = 0
+BOUND_LOWER = 2     # fail high: the true score is at least this
+BOUND_UPPER = 4     # fail low: the true score is at most this
+
+# How long to wait for another process to finish creating the file
+CREATE_TIMEOUT = 2.0
+
+# Without it Windows opens the descriptor in text mode and translates the
+# header's 0x0A and 0x1A bytes
+O_BINARY = getattr(os, "O_BINARY", 0)
+
+Entry = namedtuple("Entry", ["score", "move", "depth", "bound"], defaults=[BOUND_EXACT])
+
+def encode_move(move):
+    """Pack a move into 16 bits: from, to and promotion piece type."""
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+def decode_move(packed):
+    promotion = packed >> 12
+    return chess.Move(packed & 63, (packed >> 6) & 63, promotion or None)
+
+class PersistentHash:
+    """
+    Transposition table stored in a memory-mapped file, shared between games
+    and engine processes. The search probes and stores it at interior
+    nodes; each entry records whether its score is exact or a bound.
+
+    Entries are written lock-free: each slot stores its Zobrist key XORed with
+    its data, so a slot torn by two processes writing at once fails the check
+    and reads as a miss. Stores are buffered and written back by flush(); on a
+    slot collision the deeper result is kept. The file never grows past the
+    size it was created with.
+    """
+
+    def __init__(self, path, size_mb=16):
+        self.path = path
+        self.pending = {}
+        # O_EXCL makes exactly one process create and size the file; every
+        # other one opens the file that process wrote.
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL | O_BINARY, 0o644)
+            created = True
+        except FileExistsError:
+            fd = os.open(path, os.O_RDWR | O_BINARY)
+            created = False
+        self.file = os.fdopen(fd, "r+b")
+
+        try:
+            if created:
+                self.slots = max(1, (size_mb * 1024 * 1024 - HEADER.size) // SLOT.size)
+                # Size the file before writing the header, so a complete
+                # header means a complete file.
+                self.file.truncate(HEADER.size + self.slots * SLOT.size)
+                self.file.write(HEADER.pack(MAGIC, VERSION, self.slots))
+                self.file.flush()
+            else:
+                # Another process may have the file mapped, so keep its size.
+                self.slots = self._read_header()
+            self.map = mmap.mmap(self.file.fileno(), HEADER.size + self.slots * SLOT.size)
+        except BaseException:
+            self.file.close()
+            raise
+
+    def _read_header(self):
+        """Slot count of an existing file, waiting for its creator to finish."""
+        deadline = time.time() + CREATE_TIMEOUT
+        while True:
+            self.file.seek(0)
+            header = self.file.read(HEADER.size)
+            if len(header) == HEADER.size and header[:len(MAGIC)] != bytes(len(MAGIC)):
+                magic, version, slots = HEADER.unpack(header)
+                if magic != MAGIC or version != VERSION:
+                    raise ValueError(f"{self.path} is not a version {VERSION} persistent hash file")
+                return slots
+            if time.time() > deadline:
+                raise ValueError(f"{self.path} is not a version {VERSION} persistent hash file")
+            time.sleep(0.01)
+
+    def _offset(self, key):
+        return HEADER.size + (key % self.slots) * SLOT.size
+
+    def _read_slot(self, key):
+        check, score, move, depth, flags = SLOT.unpack_from(self.map, self._offset(key))
+        if not flags & FLAG_USED:
+            return None
+        data = int.from_bytes(DATA.pack(score, move, depth, flags), "little")
+        if check ^ data != key:
+            return None
+        return Entry(score, decode_move(move), depth, flags & ~FLAG_USED)
+
+    def probe(self, key):
+        """Return the Entry stored for a Zobrist key, or None."""
+        entry = self.pending.get(key)
+        if entry is not None:
+            return entry
+        return self._read_slot(key)
+
+    def store(self, key, score, move, depth, bound=BOUND_EXACT):
+        """Buffer a search result; it reaches the file on the next flush()."""
+        current = self.pending.get(key)
+        if current is None or depth >= current.depth:
+            self.pending[key] = Entry(score, move, depth, bound)
+
+    def flush(self):
+        """Write buffered entries back to the mapped file."""
+        for key, entry in self.pending.items():
+            offset = self._offset(key)
+            old_check, old_score, old_move, old_depth, old_flags = SLOT.unpack_from(self.map, offset)
+            if old_flags & FLAG_USED and old_depth > entry.depth:
+                old_data = int.from_bytes(DATA.pack(old_score, old_move, old_depth, old_flags), "little")
+                # Keep a deeper, intact result already in this slot
+                if (old_check ^ old_data) % self.slots == key % self.slots:
+                    continue
+            packed_move = encode_move(entry.move)
+            flags = FLAG_USED | entry.bound
+            data = int.from_bytes(DATA.pack(entry.score, packed_move, entry.depth, flags), "little")
+            SLOT.pack_into(self.map, offset, key ^ data, entry.score,
+                           packed_move, entry.depth, flags)
+        self.pending.clear()
+        self.map.flush()
+
+    def close(self):
+        self.flush()
+        self.map.close()
+        self.file.close()
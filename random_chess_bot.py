@@ -5,10 +5,32 @@ import sys
 
 board = chess.Board()
 
+# Start FEN and moves of the last "position" command
+last_position = [None, []]
+
 def make_random_move(b: chess.Board):
     '''Returns a random legal move'''
     return random.choice(list(b.legal_moves))
 
+def apply_position(b: chess.Board, last: list, fen: str, moves: list):
+    '''Sets b to fen followed by moves (UCI strings). last holds the
+    [fen, moves] of the previous call and is updated; if the new moves extend
+    it, only the added moves are pushed, otherwise b is rebuilt from fen.
+    b is also rebuilt if its moves no longer match last, e.g. after a caller
+    pushed a move and left it on the board'''
+    if (fen == last[0] and moves[:len(last[1])] == last[1]
+            and [move.uci() for move in b.move_stack] == last[1]):
+        new_moves = moves[len(last[1]):]
+    else:
+        b.set_fen(fen)
+        new_moves = moves
+    # Forget the old position until the moves are applied, so a bad move
+    # forces a rebuild next time
+    last[:] = [None, []]
+    for move in new_moves:
+        b.push(chess.Move.from_uci(move))
+    last[:] = [fen, list(moves)]
+
 def uci(msg: str):
     '''Returns result of UCI protocol given passed message'''
     if msg == "uci":
@@ -17,15 +39,15 @@ def uci(msg: str):
         print("uciok")
     elif msg == "isready":
         print("readyok")
-    elif msg.startswith("position startpos moves"):
-        board.clear()
-        board.set_fen(chess.STARTING_FEN)
-        moves = msg.split()[3:]
-        for move in moves:
-            board.push(chess.Move.from_uci(move))
+    elif msg.startswith("position startpos"):
+        parts = msg.split(" moves ")
+        moves = parts[1].split() if len(parts) > 1 else []
+        apply_position(board, last_position, chess.STARTING_FEN, moves)
     elif msg.startswith("position fen"):
-        fen = msg.removeprefix("position fen ")
-        board.set_fen(fen)
+        parts = msg.split(" moves ")
+        fen = parts[0].removeprefix("position fen ")
+        moves = parts[1].split() if len(parts) > 1 else []
+        apply_position(board, last_position, fen, moves)
     elif msg.startswith("go"):
         move = make_random_move(board) #change this
         print(f"bestmove {move}")
@@ -0,0 +1,504 @@
+#!/usr/bin/env python
+import sys
+
+import chess
+import chess.polyglot
+
+# Zobrist keys are the polyglot ones, so SearchBoard hashes match
+# chess.polyglot.zobrist_hash() and can share the engine's caches.
+POLYGLOT = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+ZOBRIST_PIECES = [[[POLYGLOT[64 * ((piece_type - 1) * 2 + color) + square] if piece_type else 0
+                    for square in chess.SQUARES]
+                   for piece_type in range(7)]
+                  for color in (chess.BLACK, chess.WHITE)]
+ZOBRIST_CASTLING = [(chess.BB_H1, POLYGLOT[768]), (chess.BB_A1, POLYGLOT[769]),
+                    (chess.BB_H8, POLYGLOT[770]), (chess.BB_A8, POLYGLOT[771])]
+ZOBRIST_EP_FILE = POLYGLOT[772:780]
+ZOBRIST_TURN = POLYGLOT[780]
+
+PIECES = {(piece_type, color): chess.Piece(piece_type, color)
+          for piece_type in chess.PIECE_TYPES for color in chess.COLORS}
+BETWEEN = [[chess.between(a, b) for b in chess.SQUARES] for a in chess.SQUARES]
+PROMOTION_TYPES = [chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT]
+
+def castling_key(rights):
+    key = 0
+    for mask, value in ZOBRIST_CASTLING:
+        if rights & mask:
+            key ^= value
+    return key
+
+class SearchBoard:
+    """
+    Bitboard position for the search hot path.
+
+    Implements the subset of the chess.Board interface that minimax,
+    order_moves and evaluate_board use (push/pop, legal_moves, piece_at,
+    is_check, is_capture, ...), so they run on either board type. push()
+    updates the Zobrist hash incrementally and stores a small undo record
+    instead of copying the whole state, and is_game_over() checks
+    repetitions against the hashes since the last irreversible move.
+    """
+
+    __slots__ = ("squares", "pieces_bb", "occupied_co", "occupied", "turn",
+                 "castling_rights", "ep_square", "halfmove_clock", "fullmove_number",
+                 "hash", "history", "stack")
+
+    def __init__(self, board=None):
+        board = chess.Board() if board is None else board
+        self.squares = [None] * 64
+        self.pieces_bb = [0] * 7
+        self.occupied_co = [0, 0]
+        self.occupied = 0
+        for square, piece in board.piece_map().items():
+            self._put(square, PIECES[(piece.piece_type, piece.color)])
+        self.turn = board.turn
+        self.castling_rights = board.clean_castling_rights()
+        self.ep_square = board.ep_square
+        self.halfmove_clock = board.halfmove_clock
+        self.fullmove_number = board.fullmove_number
+        self.hash = chess.polyglot.zobrist_hash(board)
+        self.stack = []
+
+        # Hashes of the earlier positions that can still repeat
+        self.history = []
+        previous = board.copy()
+        for _ in range(min(board.halfmove_clock, len(board.move_stack))):
+            previous.pop()
+            self.history.append(chess.polyglot.zobrist_hash(previous))
+        self.history.reverse()
+
+    # ======== chess.Board compatible accessors ========
+
+    @property
+    def pawns(self):
+        return self.pieces_bb[chess.PAWN]
+
+    @property
+    def knights(self):
+        return self.pieces_bb[chess.KNIGHT]
+
+    @property
+    def bishops(self):
+        return self.pieces_bb[chess.BISHOP]
+
+    @property
+    def rooks(self):
+        return self.pieces_bb[chess.ROOK]
+
+    @property
+    def queens(self):
+        return self.pieces_bb[chess.QUEEN]
+
+    @property
+    def kings(self):
+        return self.pieces_bb[chess.KING]
+
+    @property
+    def legal_moves(self):
+        return list(self.generate_legal_moves())
+
+    def piece_at(self, square):
+        return self.squares[square]
+
+    def king(self, color):
+        return (self.pieces_bb[chess.KING] & self.occupied_co[color]).bit_length() - 1
+
+    def zobrist_hash(self):
+        return self.hash
+
+    # ======== Make / unmake ========
+
+    def _put(self, square, piece):
+        mask = chess.BB_SQUARES[square]
+        self.squares[square] = piece
+        self.pieces_bb[piece.piece_type] |= mask
+        self.occupied_co[piece.color] |= mask
+        self.occupied |= mask
+
+    def _remove(self, square, piece):
+        mask = ~chess.BB_SQUARES[square]
+        self.squares[square] = None
+        self.pieces_bb[piece.piece_type] &= mask
+        self.occupied_co[piece.color] &= mask
+        self.occupied &= mask
+
+    def _ep_key(self):
+        # Polyglot only hashes the en passant file if a pawn could capture.
+        ep_square = self.ep_square
+        if ep_square is not None and (self.pieces_bb[chess.PAWN] & self.occupied_co[self.turn]
+                                      & chess.BB_PAWN_ATTACKS[not self.turn][ep_square]):
+            return ZOBRIST_EP_FILE[ep_square & 7]
+        return 0
+
+    def push(self, move):
+        """Make a move (or a null move); undo it with pop()."""
+        us = self.turn
+        old_hash = self.hash
+        old_ep = self.ep_square
+        old_rights = self.castling_rights
+        h = old_hash ^ self._ep_key() ^ ZOBRIST_TURN
+        self.history.append(old_hash)
+        self.ep_square = None
+
+        if not move:
+            self.stack.append((move, None, None, None, old_rights, old_ep, self.halfmove_clock, old_hash))
+            self.halfmove_clock += 1
+        else:
+            from_square = move.from_square
+            to_square = move.to_square
+            piece = self.squares[from_square]
+            piece_type = piece.piece_type
+            captured = self.squares[to_square]
+            capture_square = to_square
+            if piece_type == chess.PAWN and to_square == old_ep and captured is None:
+                capture_square = to_square - 8 if us else to_square + 8
+                captured = self.squares[capture_square]
+
+            self.stack.append((move, piece, captured, capture_square, old_rights, old_ep,
+                               self.halfmove_clock, old_hash))
+
+            if captured:
+                self._remove(capture_square, captured)
+                h ^= ZOBRIST_PIECES[not us][captured.piece_type][capture_square]
+            self._remove(from_square, piece)
+            h ^= ZOBRIST_PIECES[us][piece_type][from_square]
+            placed = PIECES[(move.promotion, us)] if move.promotion else piece
+            self._put(to_square, placed)
+            h ^= ZOBRIST_PIECES[us][placed.piece_type][to_square]
+
+            rights = old_rights & ~chess.BB_SQUARES[from_square] & ~chess.BB_SQUARES[to_square]
+            if piece_type == chess.KING:
+                rights &= ~(chess.BB_RANK_1 if us else chess.BB_RANK_8)
+                if to_square - from_square in (2, -2):
+                    rook_from, rook_to = ((from_square + 3, from_square + 1) if to_square > from_square
+                                          else (from_square - 4, from_square - 1))
+                    rook = self.squares[rook_from]
+                    self._remove(rook_from, rook)
+                    self._put(rook_to, rook)
+                    h ^= ZOBRIST_PIECES[us][chess.ROOK][rook_from] ^ ZOBRIST_PIECES[us][chess.ROOK][rook_to]
+            if rights != old_rights:
+                h ^= castling_key(old_rights) ^ castling_key(rights)
+                self.castling_rights = rights
+
+            if piece_type == chess.PAWN:
+                if to_square - from_square in (16, -16):
+                    self.ep_square = (from_square + to_square) // 2
+                self.halfmove_clock = 0
+            elif captured:
+                self.halfmove_clock = 0
+            else:
+                self.halfmove_clock += 1
+
+        if not us:
+            self.fullmove_number += 1
+        self.turn = not us
+        self.hash = h ^ self._ep_key()
+
+    def pop(self):
+        """Undo the last push()."""
+        move, piece, captured, capture_square, rights, ep_square, halfmove_clock, h = self.stack.pop()
+        self.history.pop()
+        self.turn = us = not self.turn
+        if not us:
+            self.fullmove_number -= 1
+
+        if move:
+            from_square = move.from_square
+            to_square = move.to_square
+            self._remove(to_square, self.squares[to_square])
+            self._put(from_square, piece)
+            if captured:
+                self._put(capture_square, captured)
+            if piece.piece_type == chess.KING and to_square - from_square in (2, -2):
+                rook_from, rook_to = ((from_square + 3, from_square + 1) if to_square > from_square
+                                      else (from_square - 4, from_square - 1))
+                rook = self.squares[rook_to]
+                self._remove(rook_to, rook)
+                self._put(rook_from, rook)
+
+        self.castling_rights = rights
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        self.hash = h
+        return move
+
+    # ======== Attacks ========
+
+    def attacks_from(self, square, piece_type):
+        if piece_type == chess.KNIGHT:
+            return chess.BB_KNIGHT_ATTACKS[square]
+        if piece_type == chess.KING:
+            return chess.BB_KING_ATTACKS[square]
+        occupied = self.occupied
+        attacks = 0
+        if piece_type != chess.BISHOP:
+            attacks = (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] |
+                       chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied])
+        if piece_type != chess.ROOK:
+            attacks |= chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+        return attacks
+
+    def attackers_mask(self, color, square, occupied=None):
+        occupied = self.occupied if occupied is None else occupied
+        bb = self.pieces_bb
+        queens_and_rooks = bb[chess.QUEEN] | bb[chess.ROOK]
+        queens_and_bishops = bb[chess.QUEEN] | bb[chess.BISHOP]
+        attackers = (
+            (chess.BB_KING_ATTACKS[square] & bb[chess.KING]) |
+            (chess.BB_KNIGHT_ATTACKS[square] & bb[chess.KNIGHT]) |
+            (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] & queens_and_rooks) |
+            (chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied] & queens_and_rooks) |
+            (chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied] & queens_and_bishops) |
+            (chess.BB_PAWN_ATTACKS[not color][square] & bb[chess.PAWN]))
+        return attackers & self.occupied_co[color]
+
+    def is_check(self):
+        return bool(self.attackers_mask(not self.turn, self.king(self.turn)))
+
+    def _pinned(self, king):
+        """Pieces of the side to move that shield their king from a slider."""
+        bb = self.pieces_bb
+        snipers = ((chess.BB_RANK_ATTACKS[king][0] | chess.BB_FILE_ATTACKS[king][0])
+                   & (bb[chess.ROOK] | bb[chess.QUEEN]))
+        snipers |= chess.BB_DIAG_ATTACKS[king][0] & (bb[chess.BISHOP] | bb[chess.QUEEN])
+        pinned = 0
+        for sniper in chess.scan_reversed(snipers & self.occupied_co[not self.turn]):
+            blockers = BETWEEN[king][sniper] & self.occupied
+            if blockers and not blockers & (blockers - 1):
+                pinned |= blockers
+        return pinned & self.occupied_co[self.turn]
+
+    # ======== Move generation ========
+
+    def generate_pseudo_legal_moves(self):
+        us = self.turn
+        own = self.occupied_co[us]
+        enemy = self.occupied_co[not us]
+        occupied = self.occupied
+        pawns = self.pieces_bb[chess.PAWN] & own
+        Move = chess.Move
+
+        for from_square in chess.scan_reversed(own & ~pawns):
+            targets = self.attacks_from(from_square, self.squares[from_square].piece_type) & ~own
+            for to_square in chess.scan_reversed(targets):
+                yield Move(from_square, to_square)
+
+        # Castling (standard chess only), path empty and not attacked
+        back_rank = chess.BB_RANK_1 if us else chess.BB_RANK_8
+        rights = self.castling_rights & back_rank
+        if rights:
+            king = self.king(us)
+            them = not us
+            if not self.attackers_mask(them, king):
+                if (rights & chess.BB_FILE_H and not occupied & (chess.BB_SQUARES[king + 1] | chess.BB_SQUARES[king + 2])
+                        and not self.attackers_mask(them, king + 1)
+                        and not self.attackers_mask(them, king + 2)):
+                    yield Move(king, king + 2)
+                if (rights & chess.BB_FILE_A
+                        and not occupied & (chess.BB_SQUARES[king - 1] | chess.BB_SQUARES[king - 2]
+                                            | chess.BB_SQUARES[king - 3])
+                        and not self.attackers_mask(them, king - 1)
+                        and not self.attackers_mask(them, king - 2)):
+                    yield Move(king, king - 2)
+
+        promotion_rank = chess.BB_RANK_8 if us else chess.BB_RANK_1
+        for from_square in chess.scan_reversed(pawns):
+            targets = chess.BB_PAWN_ATTACKS[us][from_square] & enemy
+            for to_square in chess.scan_reversed(targets):
+                if chess.BB_SQUARES[to_square] & promotion_rank:
+                    for promotion in PROMOTION_TYPES:
+                        yield Move(from_square, to_square, promotion)
+                else:
+                    yield Move(from_square, to_square)
+
+        if us:
+            single = (pawns << 8) & ~occupied & chess.BB_ALL
+            double = ((single & chess.BB_RANK_3) << 8) & ~occupied
+            step = 8
+        else:
+            single = (pawns >> 8) & ~occupied
+            double = ((single & chess.BB_RANK_6) >> 8) & ~occupied
+            step = -8
+        for to_square in chess.scan_reversed(single):
+            from_square = to_square - step
+            if chess.BB_SQUARES[to_square] & promotion_rank:
+                for promotion in PROMOTION_TYPES:
+                    yield Move(from_square, to_square, promotion)
+            else:
+                yield Move(from_square, to_square)
+        for to_square in chess.scan_reversed(double):
+            yield Move(to_square - 2 * step, to_square)
+
+        # En passant needs an enemy pawn that has just passed the square and
+        # capturers on their fifth rank; after a turn flip (the mobility
+        # term) an ep_square can be left over that fails both.
+        ep_square = self.ep_square
+        if (ep_square is not None and not occupied & chess.BB_SQUARES[ep_square]
+                and self.pieces_bb[chess.PAWN] & enemy & chess.BB_SQUARES[ep_square - step]):
+            capturers = pawns & chess.BB_PAWN_ATTACKS[not us][ep_square] & chess.BB_RANKS[4 if us else 3]
+            for from_square in chess.scan_reversed(capturers):
+                yield Move(from_square, ep_square)
+
+    def _leaves_king_safe(self, move):
+        us = self.turn
+        self.push(move)
+        safe = not self.attackers_mask(not us, self.king(us))
+        self.pop()
+        return safe
+
+    def generate_legal_moves(self):
+        us = self.turn
+        king = self.king(us)
+        if self.attackers_mask(not us, king):
+            for move in self.generate_pseudo_legal_moves():
+                if self._leaves_king_safe(move):
+                    yield move
+            return
+
+        pinned = self._pinned(king)
+        king_mask = chess.BB_SQUARES[king]
+        for move in self.generate_pseudo_legal_moves():
+            from_square = move.from_square
+            to_square = move.to_square
+            if from_square == king:
+                # Castling paths were checked during generation
+                if to_square - from_square in (2, -2) or not self.attackers_mask(
+                        not us, to_square, self.occupied & ~king_mask):
+                    yield move
+            elif to_square == self.ep_square and self.squares[from_square].piece_type == chess.PAWN:
+                if self._leaves_king_safe(move):
+                    yield move
+            elif chess.BB_SQUARES[from_square] & pinned:
+                if chess.BB_RAYS[king][from_square] & chess.BB_SQUARES[to_square]:
+                    yield move
+            else:
+                yield move
+
+    def has_legal_move(self):
+        for _ in self.generate_legal_moves():
+            return True
+        return False
+
+    # ======== Move properties ========
+
+    def is_en_passant(self, move):
+        return (move.to_square == self.ep_square and not self.squares[move.to_square]
+                and self.squares[move.from_square].piece_type == chess.PAWN
+                and move.from_square & 7 != move.to_square & 7)
+
+    def is_capture(self, move):
+        return bool(chess.BB_SQUARES[move.to_square] & self.occupied_co[not self.turn]) or self.is_en_passant(move)
+
+    def gives_check(self, move):
+        self.push(move)
+        check = self.is_check()
+        self.pop()
+        return check
+
+    # ======== Game end ========
+
+    def is_checkmate(self):
+        return self.is_check() and not self.has_legal_move()
+
+    def is_stalemate(self):
+        return not self.is_check() and not self.has_legal_move()
+
+    def is_insufficient_material(self):
+        bb = self.pieces_bb
+        if bb[chess.PAWN] | bb[chess.ROOK] | bb[chess.QUEEN]:
+            return False
+        minors = bb[chess.KNIGHT] | bb[chess.BISHOP]
+        if not minors & (minors - 1):
+            return True  # at most one minor piece
+        # Only bishops, all on squares of one colour
+        return not bb[chess.KNIGHT] and (not minors & chess.BB_DARK_SQUARES or not minors & chess.BB_LIGHT_SQUARES)
+
+    def is_repetition(self):
+        """
+        True if the position already occurred since the last irreversible
+        move. Checked from the first ply of a search, never at its root.
+        """
+        if not self.stack:
+            return False
+        h = self.hash
+        history = self.history
+        end = max(len(history) - self.halfmove_clock, 0)
+        for index in range(len(history) - 2, end - 1, -2):
+            if history[index] == h:
+                return True
+        return False
+
+    def is_game_over(self):
+        """Fast variant for search: 50-move rule, repetition, material, no moves."""
+        return (self.halfmove_clock >= 100 or self.is_repetition()
+                or self.is_insufficient_material() or not self.has_legal_move())
+
+def sorted_moves(board):
+    return sorted(m.uci() for m in board.legal_moves)
+
+def flipped_moves(board):
+    """Legal moves with the turn flipped, as the mobility term counts them."""
+    board.turn = not board.turn
+    try:
+        return sorted_moves(board)
+    finally:
+        board.turn = not board.turn
+
+def compare_boards(board, search_board):
+    """Raise ValueError describing the first difference between the boards."""
+    checks = [
+        ("pieces", board.piece_map(), {sq: p for sq, p in enumerate(search_board.squares) if p}),
+        ("turn", board.turn, search_board.turn),
+        ("castling rights", board.clean_castling_rights(), search_board.castling_rights),
+        ("ep square", board.ep_square, search_board.ep_square),
+        ("halfmove clock", board.halfmove_clock, search_board.halfmove_clock),
+        ("fullmove number", board.fullmove_number, search_board.fullmove_number),
+        ("zobrist hash", chess.polyglot.zobrist_hash(board), search_board.hash),
+        ("legal moves", sorted_moves(board), sorted_moves(search_board)),
+        ("flipped turn moves", flipped_moves(board), flipped_moves(search_board)),
+        ("check", board.is_check(), search_board.is_check()),
+        ("insufficient material", board.is_insufficient_material(), search_board.is_insufficient_material()),
+    ]
+    for name, expected, actual in checks:
+        if expected != actual:
+            raise ValueError(f"{name} differs in {board.fen()}: python-chess {expected}, SearchBoard {actual}")
+
+def validate(board, depth, search_board=None):
+    """
+    Walk every line `depth` plies deep, making and unmaking each move on both
+    `board` and a SearchBoard, and compare them at every node.
+    Returns the number of positions compared.
+    """
+    search_board = SearchBoard(board) if search_board is None else search_board
+    compare_boards(board, search_board)
+    if depth == 0:
+        return 1
+    count = 1
+    for move in list(board.legal_moves):
+        board.push(move)
+        search_board.push(move)
+        count += validate(board, depth - 1, search_board)
+        board.pop()
+        search_board.pop()
+        compare_boards(board, search_board)
+    return count
+
+VALIDATION_POSITIONS = [
+    chess.STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+]
+
+def main():
+    """Validate SearchBoard against python-chess: search_board.py [depth] [fen]"""
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    fens = [" ".join(sys.argv[2:])] if len(sys.argv) > 2 else VALIDATION_POSITIONS
+    for fen in fens:
+        count = validate(chess.Board(fen), depth)
+        print(f"ok  {count:>8} positions  {fen}")
+
+if __name__ == "__main__":
+    main()
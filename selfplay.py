@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+import argparse
+import glob
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import chess
+import numpy as np
+
+import boba_slayer
+import random_chess_bot
+
+# One record per searched position, 33 bytes. Pieces are packed instead of
+# stored as FEN: `occupied` marks the occupied squares, and `pieces` holds one
+# 4-bit code per occupied square in ascending square order (low nibble
+# first), piece type for White and piece type + 8 for Black.
+RECORD_DTYPE = np.dtype([
+    ("occupied", "<u8"),
+    ("pieces", "u1", 16),
+    ("turn", "u1"),             # 1 White, 0 Black
+    ("castling", "u1"),         # bits: White O-O, White O-O-O, Black O-O, Black O-O-O
+    ("ep_square", "u1"),        # 255 if none
+    ("halfmove_clock", "u1"),
+    ("fullmove_number", "<u2"),
+    ("score", "<i2"),           # search score, centipawns from White's view
+    ("result", "i1"),           # game result from White's view: 1, 0, -1
+])
+
+CASTLING_SQUARES = [chess.H1, chess.A1, chess.H8, chess.A8]
+SHARD_PATTERN = "shard-{:05d}.bin"
+
+def pack_position(board, record):
+    """Store the position of `board` in a RECORD_DTYPE record."""
+    occupied = board.occupied
+    codes = [piece.piece_type + (0 if piece.color else 8)
+             for piece in (board.piece_at(square) for square in chess.scan_forward(occupied))]
+    codes += [0] * (32 - len(codes))
+    record["occupied"] = occupied
+    record["pieces"] = [codes[i] | (codes[i + 1] << 4) for i in range(0, 32, 2)]
+    record["turn"] = int(board.turn)
+    record["castling"] = sum(1 << bit for bit, square in enumerate(CASTLING_SQUARES)
+                             if board.castling_rights & chess.BB_SQUARES[square])
+    record["ep_square"] = 255 if board.ep_square is None else board.ep_square
+    record["halfmove_clock"] = min(board.halfmove_clock, 255)
+    record["fullmove_number"] = min(board.fullmove_number, 65535)
+
+def unpack_board(record):
+    """Rebuild a chess.Board from a RECORD_DTYPE record."""
+    board = chess.Board(None)
+    packed = record["pieces"]
+    for index, square in enumerate(chess.scan_forward(int(record["occupied"]))):
+        code = (int(packed[index // 2]) >> (4 * (index % 2))) & 15
+        board.set_piece_at(square, chess.Piece(code & 7, not code & 8))
+    board.turn = bool(record["turn"])
+    board.castling_rights = 0
+    for bit, square in enumerate(CASTLING_SQUARES):
+        if int(record["castling"]) & (1 << bit):
+            board.castling_rights |= chess.BB_SQUARES[square]
+    ep_square = int(record["ep_square"])
+    board.ep_square = None if ep_square == 255 else ep_square
+    board.halfmove_clock = int(record["halfmove_clock"])
+    board.fullmove_number = int(record["fullmove_number"])
+    return board
+
+def play_game(nodes, random_plies, max_plies):
+    """
+    One self-play game: `random_plies` random moves, then boba_slayer with a
+    node budget for both sides. Games longer than `max_plies` are scored as
+    draws. Returns the searched positions as a RECORD_DTYPE array.
+    """
+    board = chess.Board()
+    for _ in range(random_plies):
+        if board.is_game_over():
+            break
+        board.push(random_chess_bot.make_random_move(board))
+
+    records = np.zeros(max_plies, dtype=RECORD_DTYPE)
+    count = 0
+    while count < max_plies and not board.is_game_over(claim_draw=True):
+        score, move = boba_slayer.search_fixed_nodes(board, nodes)
+        if move is None:
+            break
+        pack_position(board, records[count])
+        records[count]["score"] = max(-32767, min(32767, round(score)))
+        count += 1
+        board.push(move)
+
+    outcome = board.outcome(claim_draw=True)
+    records = records[:count]
+    if outcome is not None and outcome.winner is not None:
+        records["result"] = 1 if outcome.winner == chess.WHITE else -1
+    return records
+
+def play_shard(out_dir, shard, first_game, games, nodes, random_plies, max_plies, seed):
+    """
+    Worker: play one shard of games and write it atomically, so an
+    interrupted run leaves no partial shard behind. Each game is seeded by
+    its index, which makes a resumed run reproduce the same games.
+    Returns (shard, positions written).
+    """
+    path = os.path.join(out_dir, SHARD_PATTERN.format(shard))
+    positions = 0
+    with open(path + ".tmp", "wb") as f:
+        for game_index in range(first_game, first_game + games):
+            random.seed(seed + game_index)
+            records = play_game(nodes, random_plies, max_plies)
+            records.tofile(f)
+            positions += len(records)
+    os.replace(path + ".tmp", path)
+    return shard, positions
+
+def read_shards(directory):
+    """Memory-map every finished shard in `directory` as a RECORD_DTYPE array."""
+    shards = []
+    for path in sorted(glob.glob(os.path.join(directory, "shard-*.bin"))):
+        if os.path.getsize(path) >= RECORD_DTYPE.itemsize:
+            shards.append(np.memmap(path, dtype=RECORD_DTYPE, mode="r"))
+    return shards
+
+def main():
+    """
+    Generate labeled training positions from self-play:
+        python selfplay.py OUT_DIR --games 10000 [--nodes 2000] [--jobs N]
+    Shards already present in OUT_DIR are kept, so an interrupted run can be
+    resumed with the same arguments.
+    """
+    parser = argparse.ArgumentParser(description="Self-play training data generator")
+    parser.add_argument("out_dir")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--games-per-shard", type=int, default=50)
+    parser.add_argument("--nodes", type=int, default=2000, help="node budget per move")
+    parser.add_argument("--random-plies", type=int, default=8)
+    parser.add_argument("--max-plies", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    tasks = []
+    for shard, first_game in enumerate(range(0, args.games, args.games_per_shard)):
+        if os.path.exists(os.path.join(args.out_dir, SHARD_PATTERN.format(shard))):
+            continue
+        games = min(args.games_per_shard, args.games - first_game)
+        tasks.append((args.out_dir, shard, first_game, games, args.nodes,
+                      args.random_plies, args.max_plies, args.seed))
+    print(f"{len(tasks)} shards to play, {args.jobs} jobs")
+
+    start_time = time.time()
+    total = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        for future in as_completed([pool.submit(play_shard, *task) for task in tasks]):
+            shard, positions = future.result()
+            total += positions
+            print(f"shard {shard:>5}: {positions} positions "
+                  f"({total / (time.time() - start_time):.1f} positions/s)")
+
+if __name__ == "__main__":
+    main()
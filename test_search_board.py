@@ -0,0 +1,54 @@
+import chess
+import chess.polyglot
+import pytest
+
+import boba_slayer
+from search_board import SearchBoard, VALIDATION_POSITIONS, flipped_moves, validate
+
+def push_all(board, moves):
+    for move in moves:
+        board.push(chess.Move.from_uci(move))
+
+@pytest.mark.parametrize("fen", VALIDATION_POSITIONS)
+def test_move_generation_matches_python_chess(fen):
+    # Compares pieces, hash, legal and flipped-turn moves at every node
+    assert validate(chess.Board(fen), 2) > 1
+
+@pytest.mark.parametrize("fen", VALIDATION_POSITIONS)
+def test_evaluation_matches_python_chess(fen):
+    board = chess.Board(fen)
+    for move in list(board.legal_moves):
+        board.push(move)
+        search_board = SearchBoard(board)
+        assert search_board.hash == chess.polyglot.zobrist_hash(board)
+        assert boba_slayer.compute_evaluation(search_board) == boba_slayer.compute_evaluation(board)
+        board.pop()
+
+def test_no_en_passant_after_turn_flip():
+    board = chess.Board()
+    board.push_san("e4")
+    search_board = SearchBoard(board)
+    assert flipped_moves(search_board) == flipped_moves(board)
+    assert "d2e3" not in flipped_moves(search_board)
+    assert boba_slayer.compute_evaluation(search_board) == boba_slayer.compute_evaluation(board)
+
+def test_repetition_is_a_draw():
+    boba_slayer.clear_eval_caches()
+    board = chess.Board("4k3/8/8/8/8/8/8/Q3K1N1 w - - 0 1")
+    search_board = SearchBoard(board)
+    moves = ["g1f3", "e8d8", "f3g1", "d8e8"]
+    push_all(board, moves)
+    push_all(search_board, moves)
+    assert board.is_repetition(2) and search_board.is_repetition()
+    assert search_board.is_game_over()
+    assert boba_slayer.minimax(search_board, 2) == (0, None)
+    # The draw depends on the path, so it must not be cached for the position
+    assert boba_slayer.eval_cache.get(search_board.hash) is None
+
+def test_fifty_move_rule_is_a_draw():
+    board = chess.Board("4k3/8/8/8/8/8/8/Q3K1N1 w - - 99 80")
+    search_board = SearchBoard(board)
+    push_all(board, ["g1f3"])
+    push_all(search_board, ["g1f3"])
+    assert board.is_fifty_moves() and search_board.is_game_over()
+    assert boba_slayer.minimax(search_board, 2) == (0, None)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+import numpy as np
+
+import boba_slayer
+import selfplay
+
+RESULTS = {
+    "1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5,
+    "1": 1.0, "0": 0.0, "0.5": 0.5, "1.0": 1.0, "0.0": 0.0,
+}
+
+# Labeled positions per task sent to a feature extraction worker
+CHUNK_SIZE = 4096
+CHUNKS_PER_JOB = 4
+
+# Loss decrease that counts as progress for early stopping
+MIN_IMPROVEMENT = 1e-8
+
+def parse_labeled_line(line):
+    """
+    Split "FEN;result" (or "FEN result") into (fen, score for White).
+    Results are 1-0/0-1/1/2-1/2 or 1/0.5/0, optionally quoted or bracketed.
+    Returns None for blank or unparsable lines.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if ";" in line:
+        fen, _, result = line.rpartition(";")
+    else:
+        fen, _, result = line.rpartition(" ")
+    result = RESULTS.get(result.strip().strip('"[] '))
+    if result is None:
+        return None
+    return fen.strip(), result
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """Yield lists of at most `chunk_size` raw lines, reading the file lazily."""
+    with open(path) as f:
+        chunk = []
+        for line in f:
+            chunk.append(line)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def read_record_chunks(directory, chunk_size=CHUNK_SIZE):
+    """Yield slices of the memory-mapped self-play shards in `directory`."""
+    for shard in selfplay.read_shards(directory):
+        for start in range(0, len(shard), chunk_size):
+            yield np.array(shard[start:start + chunk_size])
+
+def extract_features(lines):
+    """
+    Worker: feature rows and results for a chunk of labeled lines. Positions
+    that are over, or in check, are skipped since the static evaluation does
+    not describe them.
+    """
+    rows = []
+    results = []
+    for line in lines:
+        parsed = parse_labeled_line(line)
+        if parsed is None:
+            continue
+        fen, result = parsed
+        try:
+            board = chess.Board(fen)
+        except ValueError:
+            continue
+        if board.is_check() or board.is_game_over():
+            continue
+        rows.append(boba_slayer.evaluation_features(board))
+        results.append(result)
+    return (np.array(rows, dtype=np.float32).reshape(-1, len(boba_slayer.EVAL_FEATURES)),
+            np.array(results, dtype=np.float32))
+
+def extract_record_features(records):
+    """Worker: like extract_features, for a slice of self-play records."""
+    rows = []
+    results = []
+    for record in records:
+        board = selfplay.unpack_board(record)
+        if board.is_check() or board.is_game_over():
+            continue
+        rows.append(boba_slayer.evaluation_features(board))
+        results.append((int(record["result"]) + 1) / 2)
+    return (np.array(rows, dtype=np.float32).reshape(-1, len(boba_slayer.EVAL_FEATURES)),
+            np.array(results, dtype=np.float32))
+
+def load_dataset(path, jobs):
+    """
+    Extract features from every labeled position in `path` on `jobs`
+    processes. `path` is a text file of labeled FENs or a directory of
+    selfplay.py shards. Returns (features, results) as NumPy arrays.
+    """
+    if os.path.isdir(path):
+        chunks, worker = read_record_chunks(path), extract_record_features
+    else:
+        chunks, worker = read_chunks(path), extract_features
+    features = []
+    results = []
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for chunk in chunks:
+            pending.append(pool.submit(worker, chunk))
+            # Bound the chunks waiting in memory
+            while len(pending) >= jobs * CHUNKS_PER_JOB:
+                x, y = pending.popleft().result()
+                features.append(x)
+                results.append(y)
+        while pending:
+            x, y = pending.popleft().result()
+            features.append(x)
+            results.append(y)
+    if not features:
+        return np.zeros((0, len(boba_slayer.EVAL_FEATURES)), np.float32), np.zeros(0, np.float32)
+    return np.concatenate(features), np.concatenate(results)
+
+def sigmoid(scores, k):
+    """Expected score for White from a centipawn evaluation."""
+    return 1.0 / (1.0 + np.power(10.0, -k * scores / 400.0))
+
+def batches(n, batch_size):
+    for start in range(0, n, batch_size):
+        yield slice(start, min(start + batch_size, n))
+
+def loss(features, results, weights, k, batch_size):
+    """Mean squared error between results and sigmoid-mapped evaluations."""
+    total = 0.0
+    for batch in batches(len(results), batch_size):
+        error = results[batch] - sigmoid(features[batch] @ weights, k)
+        total += float(np.dot(error, error))
+    return total / max(len(results), 1)
+
+def loss_and_gradient(features, results, weights, k, batch_size):
+    """loss() and its gradient with respect to the weights, in one pass."""
+    total = 0.0
+    grad = np.zeros_like(weights)
+    scale = np.log(10.0) * k / 400.0
+    for batch in batches(len(results), batch_size):
+        x = features[batch]
+        predicted = sigmoid(x @ weights, k)
+        error = results[batch] - predicted
+        total += float(np.dot(error, error))
+        # d/dw (r - s)^2 = -2 (r - s) s (1 - s) * scale * x
+        factor = -2.0 * error * predicted * (1.0 - predicted) * scale
+        grad += factor @ x
+    n = max(len(results), 1)
+    return total / n, grad / n
+
+def fit_k(features, results, weights, batch_size):
+    """Scaling constant K that minimizes the loss for the starting weights."""
+    best_k, best_loss = 1.0, float("inf")
+    step = 0.5
+    for _ in range(4):
+        candidates = np.arange(max(best_k - 4 * step, step / 10), best_k + 4 * step, step / 2)
+        for k in candidates:
+            current = loss(features, results, weights, k, batch_size)
+            if current < best_loss:
+                best_k, best_loss = float(k), current
+        step /= 4
+    return best_k
+
+def tune(features, results, weights, k, epochs=200, learning_rate=0.01, batch_size=1 << 16,
+         patience=20, frozen=("pawn",), verbose=True):
+    """
+    Full-batch gradient descent (Adam) on the evaluation weights. Adam steps
+    every weight by about the same amount whatever its gradient, so steps
+    are scaled by each starting weight's size: `learning_rate` is roughly
+    the change per epoch as a fraction of it (of 1 for weights starting at 0).
+    Features named in `frozen` keep their value; the pawn anchors the
+    centipawn scale. Stops after `patience` epochs without a lower loss.
+    Returns the weight vector with the lowest loss seen.
+    """
+    weights = weights.astype(np.float64).copy()
+    mask = np.array([name not in frozen for name in boba_slayer.EVAL_FEATURES], dtype=np.float64)
+    step_size = learning_rate * np.where(weights != 0, np.abs(weights), 1.0) * mask
+    m = np.zeros_like(weights)
+    v = np.zeros_like(weights)
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    best_weights, best_loss, improved_epoch = weights.copy(), float("inf"), 0
+    for epoch in range(1, epochs + 1):
+        current, grad = loss_and_gradient(features, results, weights, k, batch_size)
+        # `current` is the loss of the weights before this epoch's step
+        if current < best_loss - MIN_IMPROVEMENT:
+            improved_epoch = epoch
+        if current < best_loss:
+            best_weights, best_loss = weights.copy(), current
+        if epoch - improved_epoch >= patience:
+            if verbose:
+                print(f"epoch {epoch:>5}  no improvement for {patience} epochs, stopping")
+            break
+        if verbose and (epoch % 20 == 0 or epoch == 1):
+            print(f"epoch {epoch:>5}  loss {current:.6f}")
+        m = beta1 * m + (1 - beta1) * grad
+        v = beta2 * v + (1 - beta2) * grad * grad
+        m_hat = m / (1 - beta1 ** epoch)
+        v_hat = v / (1 - beta2 ** epoch)
+        weights -= step_size * m_hat / (np.sqrt(v_hat) + epsilon)
+    else:
+        current = loss(features, results, weights, k, batch_size)
+        if current < best_loss:
+            best_weights, best_loss = weights, current
+    if verbose:
+        print(f"best loss {best_loss:.6f}")
+    return best_weights
+
+def export_weights(weights, path):
+    """Write tuned weights as JSON, the format boba_slayer.load_eval_weights reads."""
+    table = {name: round(float(value), 3) for name, value in zip(boba_slayer.EVAL_FEATURES, weights)}
+    with open(path, "w") as f:
+        json.dump(table, f, indent=4)
+        f.write("\n")
+
+def main():
+    """
+    Texel tuning of the evaluation weights against game results:
+        python tuning.py positions.txt [--jobs N] [--epochs E] [--output tuned_weights.json]
+    Each line of the input is a FEN followed by the game result. A directory
+    of selfplay.py shards can be given instead of a text file. The engine
+    only uses the result once it is copied to its eval_weights.json.
+    """
+    parser = argparse.ArgumentParser(description="Tune evaluation weights on labeled positions")
+    parser.add_argument("positions")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--learning-rate", type=float, default=0.01,
+                        help="change per epoch, as a fraction of each starting weight")
+    parser.add_argument("--patience", type=int, default=20,
+                        help="stop after this many epochs without a lower loss")
+    parser.add_argument("--batch-size", type=int, default=1 << 16)
+    parser.add_argument("--k", type=float, help="sigmoid scale (fitted when omitted)")
+    parser.add_argument("--output", default="tuned_weights.json")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    features, results = load_dataset(args.positions, args.jobs)
+    print(f"{len(results)} positions, {features.shape[1]} features, "
+          f"extracted in {time.time() - start_time:.1f}s")
+    if not len(results):
+        raise SystemExit("no usable positions")
+
+    weights = np.array(boba_slayer.eval_weight_vector, dtype=np.float64)
+    k = args.k if args.k is not None else fit_k(features, results, weights, args.batch_size)
+    print(f"K = {k:.4f}, starting loss {loss(features, results, weights, k, args.batch_size):.6f}")
+
+    weights = tune(features, results, weights, k, args.epochs, args.learning_rate, args.batch_size,
+                   args.patience)
+    for name, old, new in zip(boba_slayer.EVAL_FEATURES, boba_slayer.eval_weight_vector, weights):
+        print(f"{name:<16} {old:>8} -> {new:8.2f}")
+    export_weights(weights, args.output)
+    print(f"Weights written to {args.output}")
+
+if __name__ == "__main__":
+    main()
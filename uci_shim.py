@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+import argparse
+import socket
+import sys
+import threading
+
+DEFAULT_PORT = 5100
+
+def forward_replies(sock):
+    """Copy the server's replies to stdout until it closes the connection."""
+    with sock.makefile("r", encoding="utf-8", newline="\n") as replies:
+        for line in replies:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+
+def connect(args):
+    if args.unix:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(args.unix)
+        return sock
+    return socket.create_connection((args.host, args.port))
+
+def main():
+    """
+    Thin UCI engine for GUIs: relays stdin/stdout to a running
+    engine_server.py. Without a server it plays in-process as boba_slayer.py.
+    """
+    parser = argparse.ArgumentParser(description="UCI shim for the Boba Slayer engine server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="connect to a Unix socket at this path instead")
+    args = parser.parse_args()
+
+    try:
+        sock = connect(args)
+    except OSError:
+        import boba_slayer
+        sys.argv = sys.argv[:1]
+        boba_slayer.main()
+        return
+
+    reader = threading.Thread(target=forward_replies, args=(sock,), daemon=True)
+    reader.start()
+    try:
+        for line in sys.stdin:
+            sock.sendall(line.encode())
+            if line.strip() == "quit":
+                break
+        else:
+            sock.sendall(b"quit\n")
+    except OSError:
+        pass
+    # The server answers any running search, then closes the session
+    reader.join()
+    sock.close()
+
+if __name__ == "__main__":
+    main()